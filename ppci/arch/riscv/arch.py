@@ -31,6 +31,18 @@ from .rvc_instructions import CLwsp, CSwsp, CAddi16sp, CAddi4spn
 from . import instructions
 
 
+# Registers preserved by a called function. A call only clobbers the
+# caller saved registers, so values living across a call are kept in the
+# callee saved registers, without any spill and reload around the call.
+CALLEE_SAVED = (R9, R18, R19, R20, R21, R22, R23, R24, R25, R26, R27)
+CALLER_SAVED = (R10, R11, R12, R13, R14, R15, R16, R17)
+
+# Registers used to pass arguments:
+ARG_REGISTERS = (R12, R13, R14, R15, R16, R17)
+FLOAT_ARG_REGISTERS = (F12, F13, F14, F15, F16, F17)
+FLOAT_TYPES = (ir.f32, ir.f64)
+
+
 def isinsrange(bits, val):
     msb = 1 << (bits - 1)
     ll = -msb
@@ -68,6 +80,9 @@ class RiscvArch(Architecture):
     name = "riscv"
     option_names = ("rvc", "rvf", "rvfx")
 
+    # Serialized runtime objects, shared by instances with the same options
+    _runtime_cache = {}
+
     def __init__(self, options=None):
         super().__init__(options=options)
         if self.has_option("rvc"):
@@ -119,20 +134,8 @@ class RiscvArch(Architecture):
         )
 
         self.fp = FP
-        self.callee_save = (
-            R9,
-            R18,
-            R19,
-            R20,
-            R21,
-            R22,
-            R23,
-            R24,
-            R25,
-            R26,
-            R27,
-        )
-        self.caller_save = (R10, R11, R12, R13, R14, R15, R16, R17)
+        self.callee_save = CALLEE_SAVED
+        self.caller_save = CALLER_SAVED
         # (LR, FP, R9, R18, R19, R20, R21 ,R22, R23 ,R24, R25, R26, R27)
 
     def branch(self, reg, lab):
@@ -150,38 +153,17 @@ class RiscvArch(Architecture):
     def get_runtime(self):
         """ Implement compiler runtime functions """
         from ...api import asm
+        from ...binutils.objectfile import deserialize
 
-        asm_src = """
-        __sdiv:
-        ; Divide x12 by x13
-        ; x14 is a work register.
-        ; x10 is the quotient
-
-        mv x10, x0     ; Initialize the result
-        li x14, 1      ; mov divisor into temporary register.
-
-        ; Blow up part: blow up divisor until it is larger than the divident.
-        __shiftl:
-        bge x13, x12, __cont1
-        slli x13, x13, 1
-        slli x14, x14, 1
-        j __shiftl
-
-        ; Repeatedly substract shifted versions of divisor
-        __cont1:
-        beq x14, x0, __exit
-        blt x12, x13, __skip
-        sub x12, x12, x13
-        or x10, x10, x14
-        __skip:
-        srli x13, x13, 1
-        srli x14, x14, 1
-        j __cont1
-
-        __exit:
-        jalr x0,ra,0
-        """
-        return asm(io.StringIO(asm_src), self)
+        key = self.make_id_str()
+        if key not in self._runtime_cache:
+            obj = asm(io.StringIO(RISCV_ASM_RT), self)
+            self._runtime_cache[key] = obj.serialize()
+            return obj
+
+        # The object file refers to its architecture, so recreate it for
+        # this instance from the cached data:
+        return deserialize(dict(self._runtime_cache[key], arch=self))
 
     def move(self, dst, src):
         """ Generate a move from src to dst """
@@ -299,8 +281,9 @@ class RiscvArch(Architecture):
             return values in R10
         """
         locations = []
-        regs = [R12, R13, R14, R15, R16, R17]
-        fregs = [F12, F13, F14, F15, F16, F17]
+        regs = iter(ARG_REGISTERS)
+        fregs = iter(FLOAT_ARG_REGISTERS)
+        use_fregs = self.has_option("rvf")
 
         offset = 0
         for a in arg_types:
@@ -308,17 +291,15 @@ class RiscvArch(Architecture):
                 r = StackLocation(offset, a.size)
                 offset += a.size
             else:
-                if a in [ir.f32, ir.f64] and self.has_option("rvf"):
-                    if fregs:
-                        r = fregs.pop(0)
-                    else:
+                if use_fregs and a in FLOAT_TYPES:
+                    r = next(fregs, None)
+                    if r is None:
                         arg_size = self.info.get_size(a)
                         r = StackLocation(offset, a.size)
                         offset += arg_size
                 else:
-                    if regs:
-                        r = regs.pop(0)
-                    else:
+                    r = next(regs, None)
+                    if r is None:
                         arg_size = self.info.get_size(a)
                         r = StackLocation(offset, arg_size)
                         offset += arg_size
@@ -326,7 +307,7 @@ class RiscvArch(Architecture):
         return locations
 
     def determine_rv_location(self, ret_type):
-        if ret_type in [ir.f32, ir.f64] and self.has_option("rvf"):
+        if ret_type in FLOAT_TYPES and self.has_option("rvf"):
             rv = F10
         else:
             rv = R10
@@ -355,31 +336,24 @@ class RiscvArch(Architecture):
             yield Addi(FP, SP, 8)  # Setup frame pointer
         # yield Addi(FP, SP, 8)  # Setup frame pointer
 
-        saved_registers = self.get_callee_saved(frame)
-        rsize = 4 * len(saved_registers)
-        rsize = round_up(rsize)
+        # Reserve space for the callee saved registers and the outgoing
+        # call arguments with a single stack pointer adjustment:
+        size, slots = self.calculate_register_save_slots(frame)
 
-        if self.has_option("rvc") and isinsrange(10, rsize):
-            yield CAddi16sp(-rsize)  # Reserve stack space
+        # The same area is freed in the epilogue, so check the range of the
+        # amount itself, and use the same instruction in both places:
+        if self.has_option("rvc") and isinsrange(10, size):
+            yield CAddi16sp(-size)  # Reserve stack space
         else:
-            yield Addi(SP, SP, -rsize)  # Reserve stack space
+            yield Addi(SP, SP, -size)  # Reserve stack space
 
-        i = 0
-        for register in saved_registers:
-            i -= 4
-            if self.has_option("rvc"):
-                yield CSwsp(register, i + rsize)
-            else:
-                yield Sw(register, i + rsize, SP)
-
-        # Allocate space for outgoing calls:
-        extras = max(frame.out_calls) if frame.out_calls else 0
-        if extras:
-            ssize = round_up(extras)
-            if self.has_option("rvc") and isinsrange(10, ssize):
-                yield CAddi16sp(-ssize)  # Reserve stack space
-            else:
-                yield Addi(SP, SP, -ssize)  # Reserve stack space
+        use_rvc = self.has_option("rvc")
+        yield from [
+            CSwsp(register, offset)
+            if use_rvc and offset < 256
+            else Sw(register, offset, SP)
+            for register, offset in slots
+        ]
 
     def litpool(self, frame):
         """ Generate instruction for the current literals """
@@ -411,32 +385,21 @@ class RiscvArch(Architecture):
         """ Return epilogue sequence for a frame. Adjust frame pointer
             and add constant pool
         """
-        # Free space for outgoing calls:
-        extras = max(frame.out_calls) if frame.out_calls else 0
-        if extras:
-            ssize = round_up(extras)
-            if self.has_option("rvc") and isinsrange(10, ssize):
-                yield CAddi16sp(ssize)  # Reserve stack space
-            else:
-                yield Addi(SP, SP, ssize)  # Reserve stack space
-
-        # Callee saved registers:
-        saved_registers = self.get_callee_saved(frame)
-        rsize = 4 * len(saved_registers)
-        rsize = round_up(rsize)
-
-        i = 0
-        for register in saved_registers:
-            i -= 4
-            if self.has_option("rvc"):
-                yield CLwsp(register, i + rsize)
-            else:
-                yield Lw(register, i + rsize, SP)
-
-        if self.has_option("rvc") and isinsrange(10, rsize):
-            yield CAddi16sp(rsize)  # Reserve stack space
+        # Callee saved registers, stored above the outgoing call area:
+        size, slots = self.calculate_register_save_slots(frame)
+
+        use_rvc = self.has_option("rvc")
+        yield from [
+            CLwsp(register, offset)
+            if use_rvc and offset < 256
+            else Lw(register, offset, SP)
+            for register, offset in slots
+        ]
+
+        if self.has_option("rvc") and isinsrange(10, size):
+            yield CAddi16sp(size)  # Free stack space
         else:
-            yield Addi(SP, SP, rsize)  # Reserve stack space
+            yield Addi(SP, SP, size)  # Free stack space
 
         if self.has_option("rvc"):
             yield CLwsp(LR, 4)
@@ -462,13 +425,60 @@ class RiscvArch(Architecture):
             yield instruction
         yield Align(4)  # Align at 4 bytes
 
+    def calculate_register_save_slots(self, frame):
+        """ Determine the stack space below the frame pointer, used for the
+        callee saved registers and the outgoing call arguments.
+
+        Returns the size of this space and a list of (register, offset)
+        pairs for the callee saved registers, placed at the top of it.
+        """
+        saved_registers = self.get_callee_saved(frame)
+        size = round_up(4 * len(saved_registers))
+        extras = max(frame.out_calls) if frame.out_calls else 0
+        if extras:
+            size += round_up(extras)
+        slots = [
+            (register, size - 4 * (i + 1))
+            for i, register in enumerate(saved_registers)
+        ]
+        return size, slots
+
     def get_callee_saved(self, frame):
-        saved_registers = []
-        for register in self.callee_save:
-            if frame.is_used(register, self.info.alias):
-                saved_registers.append(register)
-        return saved_registers
+        alias = self.info.alias
+        return [r for r in self.callee_save if frame.is_used(r, alias)]
 
 
 def round_up(s):
     return s + (16 - s % 16)
+
+
+RISCV_ASM_RT = """
+__sdiv:
+; Divide x12 by x13
+; x14 is a work register.
+; x10 is the quotient
+
+mv x10, x0     ; Initialize the result
+li x14, 1      ; mov divisor into temporary register.
+
+; Blow up part: blow up divisor until it is larger than the divident.
+__shiftl:
+bge x13, x12, __cont1
+slli x13, x13, 1
+slli x14, x14, 1
+j __shiftl
+
+; Repeatedly substract shifted versions of divisor
+__cont1:
+beq x14, x0, __exit
+blt x12, x13, __skip
+sub x12, x12, x13
+or x10, x10, x14
+__skip:
+srli x13, x13, 1
+srli x14, x14, 1
+j __cont1
+
+__exit:
+jalr x0,ra,0
+"""
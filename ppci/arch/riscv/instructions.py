@@ -1330,6 +1330,58 @@ def pattern_div_u32(context, tree, c0, c1):
     return d
 
 
+def power_of_two_shift(value):
+    """ Determine n for which value equals 2 ** n, when 0 < n < 32 """
+    if 1 < value < (1 << 32) and value & (value - 1) == 0:
+        return value.bit_length() - 1
+
+
+def signed_power_of_two_shift(value):
+    """ Determine n for which abs(value) equals 2 ** n, when 0 < n < 31 """
+    if abs(value) < (1 << 31):
+        return power_of_two_shift(abs(value))
+
+
+@isa.pattern(
+    "reg",
+    "DIVI32(reg, CONSTI32)",
+    size=8,
+    condition=lambda t: signed_power_of_two_shift(t.children[1].value),
+)
+def pattern_div_i32_pow2(context, tree, c0):
+    """ Signed division by a power of two.
+
+    Negative dividends are biased with 2 ** n - 1 before shifting, so that
+    the result rounds towards zero, just like the div instruction.
+    """
+    divisor = tree.children[1].value
+    n = signed_power_of_two_shift(divisor)
+    sign = context.new_reg(RiscvRegister)
+    bias = context.new_reg(RiscvRegister)
+    biased = context.new_reg(RiscvRegister)
+    d = context.new_reg(RiscvRegister)
+    context.emit(Srai(sign, c0, 31))
+    context.emit(Srli(bias, sign, 32 - n))
+    context.emit(Addr(biased, c0, bias))
+    context.emit(Srai(d, biased, n))
+    if divisor < 0:
+        context.emit(Subr(d, R0, d))
+    return d
+
+
+@isa.pattern(
+    "reg",
+    "DIVU32(reg, CONSTU32)",
+    size=2,
+    condition=lambda t: power_of_two_shift(t.children[1].value),
+)
+def pattern_div_u32_pow2(context, tree, c0):
+    d = context.new_reg(RiscvRegister)
+    n = power_of_two_shift(tree.children[1].value)
+    context.emit(Srli(d, c0, n))
+    return d
+
+
 @isa.pattern("reg", "REMI32(reg, reg)", size=10)
 def pattern_rem_i32(context, tree, c0, c1):
     d = context.new_reg(RiscvRegister)
@@ -4,9 +4,10 @@ This module can be used to work with intel hexfiles.
 
 """
 
+import bisect
+import re
 import struct
-import binascii
-from ..utils.hexdump import hexdump, chunks
+from ..utils.hexdump import hexdump
 
 
 DATA = 0
@@ -14,6 +15,16 @@ EOF = 1
 EXTLINADR = 4
 STARTADDR = 5
 
+# A line holding a record, the group excludes surrounding whitespace:
+RECORD_LINE = re.compile(r"^\s*(:.*?)\s*$", re.MULTILINE)
+
+# Number of data bytes per record when saving:
+RECORD_SIZE = 30
+
+# Big endian 16 and 32 bits fields in the records:
+_U16 = struct.Struct(">H")
+_U32 = struct.Struct(">I")
+
 
 class HexFileException(Exception):
     """ Exception raised when hexfile handling fails """
@@ -35,16 +46,24 @@ class HexLine:
         # Remove ':'
         if line[0] != ":":
             raise ValueError("Expect hexline to start with :")
-        line = line[1:]
+        return cls.from_record(bytes.fromhex(line[1:]))
+
+    @classmethod
+    def from_record(cls, nums: bytes):
+        """ Create a hexline from the decoded bytes of a record """
+        if len(nums) == 21 and nums[0] == 16:
+            # Fast path for the common record with 16 data bytes:
+            if sum(nums) & 0xFF:
+                raise HexFileException("crc incorrect")
+            return cls((nums[1] << 8) | nums[2], nums[3], nums[4:20])
 
-        nums = bytes.fromhex(line)
         bytecount = nums[0]
         if len(nums) != bytecount + 5:
             raise HexFileException("byte count field incorrect")
         crc = sum(nums)
         if (crc & 0xFF) != 0:
             raise HexFileException("crc incorrect")
-        address = struct.unpack(">H", nums[1:3])[0]
+        address = _U16.unpack_from(nums, 1)[0]
         typ = nums[3]
         data = nums[4:-1]
         return cls(address, typ, data)
@@ -52,31 +71,51 @@ class HexLine:
     def to_line(self) -> str:
         """ Create an ascii hex line """
         bytecount = len(self.data)
-        nums = bytearray()
-        nums.append(bytecount)
-        nums.extend(struct.pack(">H", self.address))
-        nums.append(self.typ)
-        nums.extend(self.data)
-        crc = sum(nums)
-        crc = ((~crc) + 1) & 0xFF
-        nums.append(crc)
-        line = ":" + binascii.hexlify(nums).decode("ascii")
+        # Record layout: count, address (2 bytes), type, data, checksum
+        nums = bytearray(bytecount + 5)
+        nums[0] = bytecount
+        _U16.pack_into(nums, 1, self.address)
+        nums[3] = self.typ
+        nums[4:-1] = self.data
+        # The checksum byte is still zero here, so summing all is fine:
+        nums[-1] = (-sum(nums)) & 0xFF
+        # Intel hex files conventionally use upper case digits:
+        line = ":" + nums.hex().upper()
         return line
 
 
 def hexfields(f):
-    for line in f:
-        # Strip spaces and newlines:
-        line = line.strip()
-
-        if not line:
-            # Skip empty lines
-            continue
-
-        if line[0] != ":":
-            # Skip lines that do not start with a ':'
-            continue
-        yield HexLine.from_line(line)
+    """ Parse all hex records from the given file.
+
+    The payloads of all records are decoded at once and sliced into
+    records afterwards. If the bulk decoding fails, the lines are decoded
+    one by one, so that the proper error is raised.
+    """
+    # Take the lines starting with a ':', without surrounding spaces:
+    lines = RECORD_LINE.findall(f.read())
+
+    payload = "".join(line[1:] for line in lines)
+    try:
+        nums = bytes.fromhex(payload)
+    except ValueError:
+        nums = None
+
+    # Each line must decode into a whole number of bytes, else the
+    # records cannot be sliced from the bulk data:
+    if (
+        nums is None
+        or len(nums) * 2 != len(payload)
+        or any(len(line) % 2 == 0 for line in lines)
+    ):
+        for line in lines:
+            yield HexLine.from_line(line)
+        return
+
+    offset = 0
+    for line in lines:
+        size = len(line) // 2
+        yield HexLine.from_record(nums[offset : offset + size])
+        offset += size
 
 
 class HexFile:
@@ -84,6 +123,8 @@ class HexFile:
 
     def __init__(self):
         self.regions = []
+        # Start addresses of the regions, kept in the same sorted order:
+        self._addresses = []
         self.start_address = 0
 
     @staticmethod
@@ -99,13 +140,13 @@ class HexFile:
             if line.typ == DATA:
                 self.add_region(line.address + ext, line.data)
             elif line.typ == EXTLINADR:
-                ext = (struct.unpack(">H", line.data[0:2])[0]) << 16
+                ext = _U16.unpack_from(line.data)[0] << 16
             elif line.typ == EOF:
                 if len(line.data) != 0:
                     raise HexFileException("end of file not empty")
                 end_of_file = True
             elif line.typ == STARTADDR:
-                self.start_address = struct.unpack(">I", line.data[0:4])[0]
+                self.start_address = _U32.unpack_from(line.data)[0]
             else:  # pragma: no cover
                 raise NotImplementedError(
                     "record type {0} not implemented".format(line.typ)
@@ -128,26 +169,51 @@ class HexFile:
         oregions = other.regions
         if len(regions) != len(oregions):
             return False
+        # Compare the layout of all regions before comparing any data:
+        if any(
+            rs.address != ro.address or rs.size != ro.size
+            for rs, ro in zip(regions, oregions)
+        ):
+            return False
         return all(rs == ro for rs, ro in zip(regions, oregions))
 
     def add_region(self, address, data):
         """ Add a chunk of data at the given address """
-        region = HexFileRegion(address, data)
-        self.regions.append(region)
-        self.check()
+        if not data:
+            # Empty records hold no data, and would otherwise be taken as
+            # overlapping a region starting at the same address.
+            return
+
+        regions = self.regions
+        index = bisect.bisect_left(self._addresses, address)
+
+        # Only the direct neighbours can overlap or touch the new region:
+        previous = regions[index - 1] if index > 0 else None
+        following = regions[index] if index < len(regions) else None
+        if previous and previous.end_address > address:
+            raise HexFileException("Overlapping regions")
+        if following and address + len(data) > following.address:
+            raise HexFileException("Overlapping regions")
+
+        if previous and previous.end_address == address:
+            previous.add_data(data)
+            region = previous
+        else:
+            region = HexFileRegion(address, data)
+            regions.insert(index, region)
+            self._addresses.insert(index, address)
+            index += 1
+
+        if following and region.end_address == following.address:
+            region.add_data(following._data)
+            del regions[index]
+            del self._addresses[index]
 
     def check(self):
-        self.regions.sort(key=lambda r: r.address)
-        change = True
-        while change and len(self.regions) > 1:
-            change = False
-            for r1, r2 in zip(self.regions[:-1], self.regions[1:]):
-                if r1.end_address == r2.address:
-                    r1.add_data(r2.data)
-                    self.regions.remove(r2)
-                    change = True
-                elif r1.end_address > r2.address:
-                    raise HexFileException("Overlapping regions")
+        """ Check that the regions are sorted and do not overlap """
+        for r1, r2 in zip(self.regions[:-1], self.regions[1:]):
+            if r1.end_address > r2.address:
+                raise HexFileException("Overlapping regions")
 
     def merge(self, other):
         for region in other.regions:
@@ -163,14 +229,17 @@ class HexFile:
         for region in self.regions:
             ext = region.address & 0xFFFF0000
             self.write_hex_line(
-                HexLine(0, EXTLINADR, struct.pack(">H", ext >> 16))
+                HexLine(0, EXTLINADR, _U16.pack(ext >> 16))
             )
             address = region.address - ext
-            for chunk in chunks(region.data):
+            # Slices of a memoryview do not copy the data:
+            data = memoryview(region._data)
+            for offset in range(0, len(data), RECORD_SIZE):
+                chunk = data[offset : offset + RECORD_SIZE]
                 if address >= 0x10000:
                     ext += 0x10000
                     self.write_hex_line(
-                        HexLine(0, EXTLINADR, struct.pack(">H", ext >> 16))
+                        HexLine(0, EXTLINADR, _U16.pack(ext >> 16))
                     )
                     address -= 0x10000
                 self.write_hex_line(HexLine(address, DATA, chunk))
@@ -183,26 +252,38 @@ class HexFileRegion:
 
     def __init__(self, address, data=bytes()):
         self.address = address
-        self.data = data
+        # Keep a growable buffer, so that merging regions does not copy
+        # all data gathered so far:
+        self._data = bytearray(data)
 
     def __repr__(self):
         return "Region at 0x{:08X} of {} bytes".format(
-            self.address, len(self.data)
+            self.address, len(self._data)
         )
 
     def __eq__(self, other):
-        return (self.address, self.data) == (other.address, other.data)
+        # Comparing the bytearrays checks their lengths before the contents:
+        return self.address == other.address and self._data == other._data
 
     def add_data(self, data):
         """ Add data to this region """
-        self.data = self.data + data
+        self._data.extend(data)
+
+    @property
+    def data(self):
+        """ The data contained in this region """
+        return bytes(self._data)
+
+    @data.setter
+    def data(self, data):
+        self._data = bytearray(data)
 
     @property
     def size(self):
         """ The size of this region """
-        return len(self.data)
+        return len(self._data)
 
     @property
     def end_address(self):
         """ End address for this region """
-        return self.address + len(self.data)
+        return self.address + len(self._data)
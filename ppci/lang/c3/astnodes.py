@@ -4,6 +4,7 @@ The tree is build by the parser.
 Then it is checked
 Finally code is generated from it.
 """
+import sys
 from ..generic.nodes import Node
 
 
@@ -15,8 +16,11 @@ class Symbol(Node):
     """ Symbol is the base class for all named things like variables,
         functions, constants and types and modules """
 
+    __slots__ = ()
+
     def __init__(self, name, public):
-        self.name = name
+        # Names are referred to many times, so share a single string:
+        self.name = sys.intern(name)
         self.public = public
 
 
@@ -57,7 +61,7 @@ class Module(Symbol):
 class Type(Node):
     """ Base class of all types """
 
-    pass
+    __slots__ = ()
 
 
 class NamedType(Type, Symbol):
@@ -113,6 +117,8 @@ class EnumType:
 class FunctionType(Type):
     """ Function blueprint, defines argument types and return type """
 
+    __slots__ = ("parametertypes", "returntype", "volatile")
+
     def __init__(self, parametertypes, returntype):
         self.parametertypes = parametertypes
         self.returntype = returntype
@@ -125,8 +131,10 @@ class FunctionType(Type):
 class PointerType(Type):
     """ A type that points to data of some other type """
 
+    __slots__ = ("ptype", "volatile")
+
     def __init__(self, ptype):
-        assert isinstance(ptype, Type) or isinstance(ptype, Expression)
+        assert isinstance(ptype, (Type, Expression))
         self.ptype = ptype
 
     def __repr__(self):
@@ -136,9 +144,10 @@ class PointerType(Type):
 class StructField:
     """ Field of a struct type """
 
+    __slots__ = ("name", "typ", "offset")
+
     def __init__(self, name, typ):
-        assert isinstance(name, str)
-        self.name = name
+        self.name = sys.intern(name)
         self.typ = typ
 
     def __repr__(self):
@@ -148,16 +157,17 @@ class StructField:
 class StructureType(Type):
     """ Struct type consisting of several named members """
 
+    __slots__ = ("fields", "volatile", "_field_map")
+
     def __init__(self, fields):
         self.fields = fields
         assert all(isinstance(mem, StructField) for mem in fields)
+        # Lookup table by name, in which the first of duplicate names wins:
+        self._field_map = {mem.name: mem for mem in reversed(fields)}
 
     def has_field(self, name):
         """ Check if the struct type has a member with name """
-        for mem in self.fields:
-            if name == mem.name:
-                return True
-        return False
+        return name in self._field_map
 
     def field_type(self, name):
         """ Get the field type of field name """
@@ -169,10 +179,7 @@ class StructureType(Type):
 
     def find_field(self, name):
         """ Looks up a field in the struct type """
-        for mem in self.fields:
-            if name == mem.name:
-                return mem
-        raise KeyError(name)  # pragma: no cover
+        return self._field_map[name]
 
     def __repr__(self):
         return "STRUCT"
@@ -181,6 +188,8 @@ class StructureType(Type):
 class ArrayType(Type):
     """ Array type """
 
+    __slots__ = ("element_type", "size", "volatile")
+
     def __init__(self, element_type, size):
         self.element_type = element_type
         self.size = size
@@ -193,7 +202,6 @@ class DefinedType(NamedType):
     """ A named type indicating another type """
 
     def __init__(self, name, typ, public, loc):
-        assert isinstance(name, str)
         super().__init__(name, public)
         self.typ = typ
         self.loc = loc
@@ -252,6 +260,8 @@ class Function(Symbol):
 class Expression(Node):
     """ Expression base class """
 
+    __slots__ = ("loc", "typ", "lvalue")
+
     is_bool = False
 
     def __init__(self, loc):
@@ -261,6 +271,8 @@ class Expression(Node):
 class Sizeof(Expression):
     """ Sizeof built-in contraption """
 
+    __slots__ = ("query_typ",)
+
     def __init__(self, typ, loc):
         super().__init__(loc)
         self.query_typ = typ
@@ -269,6 +281,8 @@ class Sizeof(Expression):
 class Deref(Expression):
     """ Data pointer dereference """
 
+    __slots__ = ("ptr",)
+
     def __init__(self, ptr, loc):
         super().__init__(loc)
         assert isinstance(ptr, Expression)
@@ -281,6 +295,8 @@ class Deref(Expression):
 class TypeCast(Expression):
     """ Type cast expression to another type """
 
+    __slots__ = ("to_type", "a")
+
     def __init__(self, to_type, x, loc):
         super().__init__(loc)
         self.to_type = to_type
@@ -293,12 +309,13 @@ class TypeCast(Expression):
 class Member(Expression):
     """ Field reference of some object, can also be package selection """
 
+    __slots__ = ("base", "field", "volatile")
+
     def __init__(self, base, field, loc):
         super().__init__(loc)
         assert isinstance(base, Expression)
-        assert isinstance(field, str)
         self.base = base
-        self.field = field
+        self.field = sys.intern(field)
 
     def __repr__(self):
         return "{}.{}".format(self.base, self.field)
@@ -307,6 +324,8 @@ class Member(Expression):
 class Index(Expression):
     """ Index something, for example an array """
 
+    __slots__ = ("base", "i")
+
     def __init__(self, base, i, loc):
         super().__init__(loc)
         self.base = base
@@ -319,6 +338,8 @@ class Index(Expression):
 class Unop(Expression):
     """ Operation on one operand, typically 'op' 'expr' """
 
+    __slots__ = ("a", "op")
+
     arithmatic_ops = ("+", "-")
     logical_ops = ("not",)
     pointer_ops = ("&", "*")
@@ -328,10 +349,9 @@ class Unop(Expression):
     def __init__(self, op, a, loc):
         super().__init__(loc)
         assert isinstance(a, Expression)
-        assert isinstance(op, str)
         assert op in self.all_ops
         self.a = a
-        self.op = op
+        self.op = sys.intern(op)
 
     def __repr__(self):
         return "UNOP {}".format(self.op)
@@ -345,6 +365,8 @@ class Unop(Expression):
 class Binop(Expression):
     """ Expression taking two operands and one operator """
 
+    __slots__ = ("a", "b", "op")
+
     arithmatic_ops = ("+", "-", "*", "/", "%", ">>", "<<", "&", "|", "^")
     logical_ops = ("and", "or")
     compare_ops = ("==", "!=", "<", ">", "<=", ">=")
@@ -355,11 +377,10 @@ class Binop(Expression):
         super().__init__(loc)
         assert isinstance(a, Expression), type(a)
         assert isinstance(b, Expression)
-        assert isinstance(op, str)
         assert op in self.all_ops
         self.a = a
         self.b = b
-        self.op = op  # Operation: '+', '-', '*', '/', 'mod'
+        self.op = sys.intern(op)  # Operation: '+', '-', '*', '/', 'mod'
 
     def __repr__(self):
         return "BINOP {}".format(self.op)
@@ -374,6 +395,8 @@ class Identifier(Expression):
     """ Reference to some identifier, can be anything from package, variable
         function or type, any named thing! """
 
+    __slots__ = ("scope", "target", "volatile")
+
     def __init__(self, target, scope, loc):
         super().__init__(loc)
         self.scope = scope
@@ -386,8 +409,14 @@ class Identifier(Expression):
 class Literal(Expression):
     """ Constant value or string """
 
+    __slots__ = ("val",)
+
     def __init__(self, val, loc):
         super().__init__(loc)
+        # Each literal has its own location, so the nodes cannot be
+        # shared, but equal string values can:
+        if isinstance(val, str):
+            val = sys.intern(val)
         self.val = val
 
     def __repr__(self):
@@ -397,6 +426,8 @@ class Literal(Expression):
 class ExpressionList(Expression):
     """ List of expressions """
 
+    __slots__ = ("expressions",)
+
     def __init__(self, expressions, loc):
         super().__init__(loc)
         self.expressions = expressions
@@ -408,6 +439,8 @@ class ExpressionList(Expression):
 class NamedExpressionList(Expression):
     """ List of named expressions """
 
+    __slots__ = ("expressions",)
+
     def __init__(self, expressions, loc):
         super().__init__(loc)
         self.expressions = expressions
@@ -419,6 +452,8 @@ class NamedExpressionList(Expression):
 class FunctionCall(Expression):
     """ Call to a some function """
 
+    __slots__ = ("proc", "args")
+
     def __init__(self, proc, args, loc):
         super().__init__(loc)
         self.proc = proc
@@ -432,6 +467,8 @@ class FunctionCall(Expression):
 class Statement(Node):
     """ Base class of all statements """
 
+    __slots__ = ("location",)
+
     def __init__(self, location):
         self.location = location
 
@@ -439,6 +476,8 @@ class Statement(Node):
 class Compound(Statement):
     """ Statement consisting of a sequence of other statements """
 
+    __slots__ = ("statements",)
+
     def __init__(self, statements, location):
         super().__init__(location)
         self.statements = statements
@@ -451,6 +490,8 @@ class Compound(Statement):
 class Empty(Statement):
     """ Empty statement which does nothing! """
 
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(None)
 
@@ -461,6 +502,8 @@ class Empty(Statement):
 class Return(Statement):
     """ Return statement """
 
+    __slots__ = ("expr",)
+
     def __init__(self, expr, loc):
         super().__init__(loc)
         self.expr = expr
@@ -472,6 +515,8 @@ class Return(Statement):
 class Assignment(Statement):
     """ Assignment statement with a left hand side and right hand side """
 
+    __slots__ = ("lval", "rval", "operator")
+
     operators = ("=", "|=", "&=", "+=", "-=", "*=")
 
     def __init__(self, lval, rval, loc, operator="="):
@@ -500,6 +545,8 @@ class Assignment(Statement):
 class VariableDeclaration(Statement):
     """ A declaration of a local variable """
 
+    __slots__ = ("var",)
+
     def __init__(self, var, loc):
         super().__init__(loc)
         self.var = var
@@ -508,6 +555,8 @@ class VariableDeclaration(Statement):
 class ExpressionStatement(Statement):
     """ When an expression is used as a statement """
 
+    __slots__ = ("ex",)
+
     def __init__(self, ex, loc):
         super().__init__(loc)
         self.ex = ex
@@ -519,6 +568,8 @@ class ExpressionStatement(Statement):
 class If(Statement):
     """ If statement """
 
+    __slots__ = ("condition", "truestatement", "falsestatement")
+
     def __init__(self, condition, truestatement, falsestatement, loc):
         super().__init__(loc)
         self.condition = condition
@@ -532,6 +583,8 @@ class If(Statement):
 class Switch(Statement):
     """ Switch statement """
 
+    __slots__ = ("expression", "options")
+
     def __init__(self, expression, options, loc):
         super().__init__(loc)
         self.expression = expression
@@ -544,6 +597,8 @@ class Switch(Statement):
 class While(Statement):
     """ While statement """
 
+    __slots__ = ("condition", "statement")
+
     def __init__(self, condition, statement, loc):
         super().__init__(loc)
         self.condition = condition
@@ -556,6 +611,8 @@ class While(Statement):
 class For(Statement):
     """ For statement with a start, condition and final statement """
 
+    __slots__ = ("init", "condition", "final", "statement")
+
     def __init__(self, init, condition, final, statement, loc):
         super().__init__(loc)
         self.init = init
@@ -0,0 +1,181 @@
+""" Test the code generated for the RISC-V architecture """
+
+import unittest
+from ppci import ir
+from ppci.api import ir_to_stream
+from ppci.irutils import Builder
+from ppci.binutils.outstream import OutputStream
+from ppci.arch.riscv.registers import LR, FP, SP, R0, R9
+from ppci.arch.riscv.instructions import Addi, Sw, Lw, Div, Divu
+from ppci.arch.riscv.instructions import Srai, Srli, Addr, Subr
+from ppci.arch.riscv.rvc_instructions import CAddi16sp, CSwsp, CLwsp
+
+
+class InstructionCollector(OutputStream):
+    """ Output stream keeping all emitted instructions """
+    def __init__(self):
+        super().__init__()
+        self.instructions = []
+
+    def do_emit(self, item):
+        self.instructions.append(item)
+
+
+def generate(module, march):
+    """ Generate code for the module and return the instructions """
+    collector = InstructionCollector()
+    ir_to_stream(module, march, collector)
+    return collector.instructions
+
+
+def new_function(name, parameter_types, return_type):
+    """ Create a module with a single function and a builder for it """
+    builder = Builder()
+    module = ir.Module(name)
+    builder.module = module
+    function = builder.new_function(name, ir.Binding.GLOBAL, return_type)
+    parameters = []
+    for index, parameter_type in enumerate(parameter_types):
+        parameter = ir.Parameter('p{}'.format(index), parameter_type)
+        function.add_parameter(parameter)
+        parameters.append(parameter)
+    builder.set_function(function)
+    entry = builder.new_block()
+    function.entry = entry
+    builder.set_block(entry)
+    return module, builder, parameters
+
+
+class RiscvFrameTestCase(unittest.TestCase):
+    """ Check the stack frame built by the prologue and epilogue """
+    def call_module(self):
+        """ A function keeping a value over a call with stack arguments """
+        module, builder, (a,) = new_function('f', [ir.i32], ir.i32)
+        g = ir.ExternalFunction('g', [ir.i32] * 8, ir.i32)
+        module.add_external(g)
+        three = builder.emit(ir.Const(3, 'three', ir.i32))
+        x = builder.emit(ir.Binop(a, '*', three, 'x', ir.i32))
+        y = builder.emit(ir.FunctionCall(g, [a] * 8, 'y', ir.i32))
+        z = builder.emit(ir.Binop(x, '+', y, 'z', ir.i32))
+        builder.emit(ir.Return(z))
+        return module
+
+    def stack_accesses(self, instructions):
+        """ Get the stores and loads relative to the stack pointer """
+        accesses = []
+        for instruction in instructions:
+            if isinstance(instruction, CSwsp) or (
+                    isinstance(instruction, Sw) and instruction.rs1 is SP):
+                accesses.append(('sw', instruction.rs2, instruction.offset))
+            elif isinstance(instruction, CLwsp) or (
+                    isinstance(instruction, Lw) and instruction.rs1 is SP):
+                accesses.append(('lw', instruction.rd, instruction.offset))
+        return accesses
+
+    def sp_adjustments(self, instructions):
+        adjustments = []
+        for instruction in instructions:
+            if isinstance(instruction, CAddi16sp):
+                adjustments.append(instruction.imm)
+            elif isinstance(instruction, Addi) and instruction.rd is SP:
+                adjustments.append(instruction.offset)
+        return adjustments
+
+    def check_layout(self, march):
+        instructions = generate(self.call_module(), march)
+
+        # One adjustment for the frame record, and a single one for the
+        # saved registers together with the outgoing call arguments:
+        self.assertEqual(
+            [-16, -32, 32, 16], self.sp_adjustments(instructions))
+
+        # The callee saved register lands just below the frame record,
+        # 12 bytes below the frame pointer, as it did with two separate
+        # adjustments. The stacked call arguments start at 0(sp).
+        accesses = self.stack_accesses(instructions)
+        self.assertEqual(
+            [('sw', LR, 4), ('sw', FP, 0), ('sw', R9, 28)], accesses[:3])
+        self.assertEqual(
+            [('sw', 0), ('sw', 4)],
+            [(kind, offset) for kind, _, offset in accesses[3:5]])
+        self.assertEqual(
+            [('lw', R9, 28), ('lw', LR, 4), ('lw', FP, 0)], accesses[5:])
+
+    def test_frame_layout(self):
+        self.check_layout('riscv')
+
+    def test_frame_layout_rvc(self):
+        self.check_layout('riscv:rvc')
+
+
+class RiscvDivisionTestCase(unittest.TestCase):
+    """ Check division by constants """
+    def divide(self, ty, divisor):
+        """ Generate code for a function dividing its argument """
+        module, builder, (a,) = new_function('f', [ty], ty)
+        d = builder.emit(ir.Const(divisor, 'd', ty))
+        q = builder.emit(ir.Binop(a, '/', d, 'q', ty))
+        builder.emit(ir.Return(q))
+        instructions = generate(module, 'riscv')
+        return [
+            i for i in instructions
+            if isinstance(i, (Srai, Srli, Addr, Subr, Div, Divu))
+        ]
+
+    def check_signed_shift(self, instructions, n):
+        sign, bias, add, shift = instructions[:4]
+        self.assertIsInstance(sign, Srai)
+        self.assertEqual(31, sign.imm)
+        self.assertIsInstance(bias, Srli)
+        self.assertIs(sign.rd, bias.rs1)
+        self.assertEqual(32 - n, bias.imm)
+        self.assertIsInstance(add, Addr)
+        self.assertIs(sign.rs1, add.rn)
+        self.assertIs(bias.rd, add.rm)
+        self.assertIsInstance(shift, Srai)
+        self.assertIs(add.rd, shift.rs1)
+        self.assertEqual(n, shift.imm)
+
+    def test_signed_power_of_two(self):
+        instructions = self.divide(ir.i32, 4)
+        self.assertEqual(4, len(instructions))
+        self.check_signed_shift(instructions, 2)
+
+    def test_signed_negative_power_of_two(self):
+        instructions = self.divide(ir.i32, -8)
+        self.assertEqual(5, len(instructions))
+        self.check_signed_shift(instructions, 3)
+        negate = instructions[4]
+        self.assertIsInstance(negate, Subr)
+        self.assertIs(R0, negate.rn)
+        self.assertIs(instructions[3].rd, negate.rm)
+
+    def test_unsigned_power_of_two(self):
+        instructions = self.divide(ir.u32, 16)
+        self.assertEqual(1, len(instructions))
+        self.assertIsInstance(instructions[0], Srli)
+        self.assertEqual(4, instructions[0].imm)
+
+    def test_unsigned_top_bit(self):
+        instructions = self.divide(ir.u32, 1 << 31)
+        self.assertEqual(1, len(instructions))
+        self.assertIsInstance(instructions[0], Srli)
+        self.assertEqual(31, instructions[0].imm)
+
+    def test_other_divisors(self):
+        """ Divisors without a shift equivalent keep using div """
+        for ty, divisor, instruction in [
+                (ir.i32, 1, Div),
+                (ir.i32, 3, Div),
+                (ir.i32, -12, Div),
+                (ir.i32, -(1 << 31), Div),
+                (ir.u32, 1, Divu),
+                (ir.u32, -16, Divu),
+                (ir.u32, 10, Divu)]:
+            instructions = self.divide(ty, divisor)
+            self.assertEqual(1, len(instructions))
+            self.assertIsInstance(instructions[0], instruction)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 import io
-from ppci.format.hexfile import HexFile, HexFileException
+from ppci.format.hexfile import HexFile, HexFileException, HexLine, DATA
 
 
 class HexFileTestCase(unittest.TestCase):
@@ -52,6 +52,39 @@ class HexFileTestCase(unittest.TestCase):
         hf.add_region(0x13, bytes.fromhex('abcdab'))
         self.assertEqual(1, len(hf.regions))
 
+    def test_merge_gap(self):
+        hf = HexFile()
+        hf.add_region(0x20, bytes.fromhex('cdef'))
+        hf.add_region(0x10, bytes.fromhex('abcdab'))
+        self.assertEqual(2, len(hf.regions))
+        hf.add_region(0x13, bytes.fromhex('00') * 13)
+        self.assertEqual(1, len(hf.regions))
+        self.assertEqual(0x10, hf.regions[0].address)
+        self.assertEqual(0x22, hf.regions[0].end_address)
+
+    def test_check(self):
+        hf = HexFile()
+        hf.add_region(0x30, bytes.fromhex('abcd'))
+        hf.add_region(0x10, bytes.fromhex('abcd'))
+        hf.add_region(0x20, bytes.fromhex('abcd'))
+        hf.check()
+        self.assertEqual(
+            [0x10, 0x20, 0x30], [r.address for r in hf.regions])
+
+    def test_region_data(self):
+        hf = HexFile()
+        hf.add_region(0x10, bytes.fromhex('abcd'))
+        region = hf.regions[0]
+        region.data = bytes.fromhex('112233')
+        self.assertEqual(bytes.fromhex('112233'), region.data)
+        self.assertEqual(0x13, region.end_address)
+
+    def test_overlapped_next(self):
+        hf = HexFile()
+        hf.add_region(0x12, bytes.fromhex('abcdab'))
+        with self.assertRaisesRegex(HexFileException, 'verlap'):
+            hf.add_region(0x10, bytes.fromhex('abcdab'))
+
     def test_overlapped(self):
         hf = HexFile()
         hf.add_region(0x10, bytes.fromhex('abcdab'))
@@ -92,6 +125,48 @@ class HexFileTestCase(unittest.TestCase):
         self.assertEqual(0x4000, hf.regions[0].address)
         self.assertSequenceEqual(bytes.fromhex('aa'), hf.regions[0].data)
 
+    def test_load_multiple_records(self):
+        txt = """:020000040001F9
+        :0240000011228B
+        :03400200334455EF
+        :00000001FF
+        """
+        hf = HexFile.load(io.StringIO(txt))
+        self.assertEqual(1, len(hf.regions))
+        self.assertEqual(0x14000, hf.regions[0].address)
+        self.assertSequenceEqual(
+            bytes.fromhex('1122334455'), hf.regions[0].data)
+
+    def test_load_empty_record(self):
+        txt = """:00001000F0
+        :01001000AA45
+        :00000001FF
+        """
+        hf = HexFile.load(io.StringIO(txt))
+        self.assertEqual(1, len(hf.regions))
+        self.assertEqual(0x10, hf.regions[0].address)
+        self.assertSequenceEqual(bytes.fromhex('aa'), hf.regions[0].data)
+
+    def test_invalid_hex_digits(self):
+        txt = ":01400000aa15\n:0140000Xaa15"
+        f = io.StringIO(txt)
+        with self.assertRaises(ValueError):
+            HexFile.load(f)
+
+    def test_to_line(self):
+        line = HexLine(0x4000, DATA, bytes.fromhex('aa'))
+        self.assertEqual(':01400000AA15', line.to_line())
+
+    def test_from_line_16_bytes(self):
+        data = bytes(range(16))
+        line = HexLine(0x1234, DATA, data).to_line()
+        line2 = HexLine.from_line(line)
+        self.assertEqual(0x1234, line2.address)
+        self.assertEqual(DATA, line2.typ)
+        self.assertEqual(data, line2.data)
+        with self.assertRaisesRegex(HexFileException, 'crc'):
+            HexLine.from_line(line[:-2] + '00')
+
     def test_incorrect_crc(self):
         txt = ":01400000aabb"
         f = io.StringIO(txt)